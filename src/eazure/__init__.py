@@ -4,21 +4,48 @@ from .files import (  # noqa
     write_blob,
     append_to_blob,
     filter_blob,
-    delete_blob_if_exists
-)
-from .tables import (  # noqa
-    table_exists,
-    create_table,
-    delete_table_if_exists,
-    query_entity,
-    query_entities,
-    delete_all_rows,
-    delete_all_rows_batch,
-    write_df_to_azure_table,
-    write_df_to_azure_table_batch,
-    add_keys_to_df,
-    rename_table,
-    copy_column,
-    delete_column,
-    rename_column,
+    delete_blob_if_exists,
+    bulk_apply,
 )
+
+# The table functions rely on the azure-cosmosdb-table package, which is slow
+# to import, so the tables module is only imported once one of them is used
+_TABLES_EXPORTS = [
+    "table_exists",
+    "create_table",
+    "delete_table_if_exists",
+    "query_entity",
+    "query_entities",
+    "delete_all_rows",
+    "delete_all_rows_batch",
+    "write_df_to_azure_table",
+    "write_df_to_azure_table_batch",
+    "add_keys_to_df",
+    "rename_table",
+    "copy_column",
+    "delete_column",
+    "rename_column",
+    "configure_table_service",
+]
+
+__all__ = [
+    "get_access",
+    "read_blob",
+    "write_blob",
+    "append_to_blob",
+    "filter_blob",
+    "delete_blob_if_exists",
+    "bulk_apply",
+] + _TABLES_EXPORTS
+
+
+def __getattr__(name: str):
+    if name in _TABLES_EXPORTS:
+        from . import tables
+
+        return getattr(tables, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> list:
+    return sorted(list(globals()) + _TABLES_EXPORTS)
@@ -1,7 +1,45 @@
+from __future__ import annotations
+
 import os
+from functools import lru_cache
 from dotenv import load_dotenv
-from typing import Literal
-from azure.cosmosdb.table.tableservice import TableService
+from typing import TYPE_CHECKING, Literal
+
+# The azure-cosmosdb-table package is slow to import, so we only import it
+# once a table service is actually requested
+if TYPE_CHECKING:
+    from azure.cosmosdb.table.tableservice import TableService
+
+
+@lru_cache(maxsize=1)
+def _load_env() -> None:
+    """
+    Loads the variables from the local .ENV file into the environment.
+    This is only done once per process as the file is not expected to
+    change while the code is running.
+    """
+    load_dotenv()
+
+
+@lru_cache(maxsize=8)
+def _get_table_service(account_name: str, account_key: str) -> TableService:
+    """
+    Returns a table service for the given storage account, configured for
+    parallel requests. Table services are cached so that repeated calls
+    reuse the same HTTP connections.
+
+    Args:
+        account_name (str): name of the Azure storage account
+        account_key (str): access key for the Azure storage account
+
+    Returns:
+        TableService: Azure table service object
+    """
+    from azure.cosmosdb.table.tableservice import TableService
+    from .tables import configure_table_service
+
+    table_service = TableService(account_name=account_name, account_key=account_key)
+    return configure_table_service(table_service)
 
 
 def get_access(
@@ -33,7 +71,7 @@ def get_access(
         is "table".
     """
     # Importing connection strings from the .ENV file
-    load_dotenv()
+    _load_env()
     conn_string = os.getenv(var_name)
     if not conn_string:
         raise ValueError("Connectiong string not found in .ENV file.")
@@ -44,10 +82,16 @@ def get_access(
 
     # Return table service string if connecting to Azure tables
     if access_type == "table":
-        parts = dict(
-            item.split("=", 1) for item in conn_string.split(";") if "=" in item
-        )
-        account_name = parts.get("AccountName")
-        account_key = parts.get("AccountKey")
-        table_service = TableService(account_name=account_name, account_key=account_key)
+        # We walk through the "key=value;" pairs only until we've found
+        # both the account name and the account key
+        account_name = account_key = None
+        remainder = conn_string
+        while remainder and not (account_name and account_key):
+            item, _, remainder = remainder.partition(";")
+            key, _, value = item.partition("=")
+            if key == "AccountName":
+                account_name = value
+            elif key == "AccountKey":
+                account_key = value
+        table_service = _get_table_service(account_name, account_key)
         return table_service
@@ -1,5 +1,5 @@
 from eazure.access import get_access
-from eazure.files import read_blob, write_blob, filter_blob
+from eazure.files import read_blob, write_blob, filter_blob, bulk_apply
 from eazure.tables import (
     table_exists,
     create_table,
@@ -112,11 +112,14 @@ timestamps_to_keep = ["2024-01-09 11:41:15"]
 # Applying the cleanup if so specified by the user
 if enable_cleanup:
     conn_string = get_access("azure_conn.txt")
-    for file in files_to_cleanup:
-        print(f"Cleaning up in file: '{file}'...")
-        filter_blob(
-            conn_string, "containerdemand", file, {"DataUpdated": timestamps_to_keep}
-        )
+    print(f"Cleaning up in files: {files_to_cleanup}...")
+    bulk_apply(
+        conn_string,
+        "containerdemand",
+        files_to_cleanup,
+        filter_blob,
+        filters={"DataUpdated": timestamps_to_keep},
+    )
 
 
 # %% Setting up connection to Azure tables and checking if a table exists
@@ -147,9 +150,6 @@ temp_df = pd.DataFrame({"Name": list_names, "Age": list_ages})
 # Note: these are required by Azure Tables
 temp_df = add_keys_to_df(temp_df, timestamp)
 
-# Appending the rows to the newly created Azure table
-write_df_to_azure_table_batch(table_service, "TestTable", temp_df)
-
 # Creating a new timestamp to use as partition key
 timestamp = dt.datetime.now()
 timestamp = timestamp.strftime("%Y-%m-%d %H:%M:%S")
@@ -160,10 +160,13 @@ list_ages = [17, 31, 42]
 temp_df2 = pd.DataFrame({"Name": list_names, "Age": list_ages})
 temp_df2 = add_keys_to_df(temp_df2, timestamp)
 
-# Appending the rows to the already existing Azure table
-# Note: the default behavior with truncate=False
-# will keep the already existing rows in the table
-write_df_to_azure_table_batch(table_service, "TestTable", temp_df2)
+# Appending the rows from both dfs to the newly created Azure table
+# Note: the default behavior with truncate=False will keep any already
+# existing rows in the table; also, it is much faster to upload all rows
+# in a single call than to make one call per df
+write_df_to_azure_table_batch(
+    table_service, "TestTable", pd.concat([temp_df, temp_df2])
+)
 
 # Overwriting the entire table with the new rows
 write_df_to_azure_table_batch(table_service, "TestTable", temp_df2, True)
@@ -182,8 +185,8 @@ write_df_to_azure_table_batch(table_service, "TestTable", temp_df3)
 # %% Renaming an Azure table
 
 # Note: if a table with the same new name exists, it will be overwritten
-# Furthermore, this operation cannot be performed using batches as the original
-# partition key and row key will be lost, so it can be a bit slow with larger tables
+# Furthermore, this operation needs to copy all rows to a new table, so it
+# can be a bit slow with larger tables
 rename_table(table_service, "TestTable", "EazureTest")
 
 
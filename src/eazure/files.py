@@ -1,14 +1,320 @@
-import io
 import pickle
 import json
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
 import os
-from azure.storage.blob import BlobServiceClient
-from typing import Any
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from importlib.util import find_spec
+from azure.core.exceptions import (
+    HttpResponseError,
+    ResourceNotFoundError,
+    ServiceRequestError,
+    ServiceResponseError,
+)
+from azure.storage.blob import BlobClient, BlobServiceClient
+from typing import IO, Any, Callable
+
+# Size (in bytes) above which temporary buffers are spilled over to disk
+_SPOOL_MAX_SIZE = 64 * 1024 * 1024
+
+# Pickle protocol 5 serializes numpy/pandas buffers without extra copies
+_PICKLE_PROTOCOL = 5
+
+# Zstd compression level used by default for parquet and feather files
+_ZSTD_LEVEL = 3
+
+# Faster (optional) engines for reading and writing Excel files, which are
+# used whenever they are installed (None means the pandas default)
+_PANDAS_VERSION = tuple(int(part) for part in pd.__version__.split(".")[:2])
+_EXCEL_READ_ENGINE = (
+    "calamine"
+    if find_spec("python_calamine") and _PANDAS_VERSION >= (2, 2)
+    else None
+)
+_EXCEL_WRITE_ENGINE = "xlsxwriter" if find_spec("xlsxwriter") else None
+
+
+@lru_cache(maxsize=8)
+def _get_service(connection_string: str) -> BlobServiceClient:
+    """
+    Returns a blob service client for the given connection string.
+    Clients are cached so that repeated calls against the same storage
+    account reuse the same HTTP pipeline and its pool of open connections.
+
+    Args:
+        connection_string (str): connection string in the format provided
+        by the get_access() function
+
+    Returns:
+        BlobServiceClient: client for the storage account
+    """
+    return BlobServiceClient.from_connection_string(connection_string)
+
+
+def _get_blob_client(
+    connection_string: str, container_name: str, blob_name: str
+) -> BlobClient:
+    """
+    Returns a client for a specific blob, created from the cached
+    blob service client for the given connection string.
+
+    Args:
+        connection_string (str): connection string in the format provided
+        by the get_access() function
+        container_name (str): name of the container where the file is stored
+        blob_name (str): path to the file inside the container itself
+
+    Returns:
+        BlobClient: client for the blob
+    """
+    return _get_service(connection_string).get_blob_client(container_name, blob_name)
+
+
+def _get_extension(blob_name: str, default_format: str | None = None) -> str:
+    """
+    Returns the (lower case) file extension of a blob, which is used to
+    determine the function used to read or write data, so that e.g.
+    "Data.XLSX" is handled like "data.xlsx". Blob names without an
+    extension (or with a generic ".df" extension) get the extension of
+    "default_format" instead, if one is given.
+
+    Args:
+        blob_name (str): path to the file inside the container itself
+        default_format (str, optional): format assumed for blob names
+        without an extension. Defaults to None.
+
+    Returns:
+        str: file extension of the blob, including the dot
+    """
+    extension = os.path.splitext(blob_name)[1].lower()
+    if default_format and extension in ["", ".df"]:
+        return f".{default_format}"
+    return extension
+
+
+def _with_zstd(kwargs: dict) -> dict:
+    """
+    Adds zstd compression to the options passed on to a parquet or feather
+    writer, unless the user has chosen a compression codec themselves.
+    Zstd gives smaller files than the default codecs at a similar speed.
+
+    Args:
+        kwargs (dict): options passed on to the writer
+
+    Returns:
+        dict: options including the compression settings
+    """
+    if "compression" in kwargs:
+        return kwargs
+    return {"compression": "zstd", "compression_level": _ZSTD_LEVEL, **kwargs}
+
+
+def _read_parquet(buffer: IO[bytes], **kwargs) -> pd.DataFrame:
+    """
+    Reads a parquet file into a pandas data frame. Without any
+    pandas-specific options, we go through pyarrow directly so that
+    Arrow memory is released while converting to pandas.
+
+    Args:
+        buffer (IO[bytes]): file-like object holding the parquet file
+
+    Returns:
+        pd.DataFrame: the data stored in the file
+    """
+    if kwargs:
+        return pd.read_parquet(buffer, **kwargs)
+    return pq.read_table(buffer).to_pandas(self_destruct=True)
+
+
+def _can_push_down(acceptable_values: list, column_type: pa.DataType) -> bool:
+    """
+    Checks whether a filter on a parquet column can be pushed down to the
+    parquet reader without changing the result, i.e. whether pyarrow would
+    match the acceptable values the same way pandas' isin() does. This is
+    only the case if the values are of the same kind as the column (numbers,
+    strings or timestamps) and can be converted to the column's type; empty
+    lists and lists with missing values are never pushed down.
+
+    Args:
+        acceptable_values (list): acceptable values for the column
+        column_type (pa.DataType): Arrow type of the column
+
+    Returns:
+        bool: can be pushed down or not
+    """
+    if len(acceptable_values) == 0 or pd.isna(acceptable_values).any():
+        return False
+    try:
+        values = pa.array(acceptable_values)
+        values.cast(column_type)
+    except (
+        pa.ArrowInvalid,
+        pa.ArrowNotImplementedError,
+        pa.ArrowTypeError,
+        OverflowError,
+    ):
+        return False
+    kinds = [
+        lambda t: pa.types.is_integer(t) or pa.types.is_floating(t),
+        lambda t: pa.types.is_string(t) or pa.types.is_large_string(t),
+        pa.types.is_timestamp,
+    ]
+    return any(kind(values.type) and kind(column_type) for kind in kinds)
+
+
+# Functions used to convert text files (which the SDK decodes for us while
+# downloading them) into Python objects, by file extension
+_TEXT_READERS = {
+    ".txt": lambda text: text,
+    ".json": json.loads,
+}
+
+# Functions used to read a downloaded blob, by file extension. Pickle files
+# ignore any extra keyword arguments, and if a pickle file is a df, it will
+# directly be imported as such
+_READERS = {
+    ".pkl": lambda buffer, **kwargs: pickle.load(buffer),
+    ".pickle": lambda buffer, **kwargs: pickle.load(buffer),
+    ".csv": pd.read_csv,
+    ".xlsx": lambda buffer, **kwargs: pd.read_excel(
+        buffer, **{"engine": _EXCEL_READ_ENGINE, **kwargs}
+    ),
+    ".xls": lambda buffer, **kwargs: pd.read_excel(
+        buffer, **{"engine": _EXCEL_READ_ENGINE, **kwargs}
+    ),
+    ".xlsm": lambda buffer, **kwargs: pd.read_excel(
+        buffer, **{"engine": _EXCEL_READ_ENGINE, **kwargs}
+    ),
+    ".html": pd.read_html,
+    ".hdf": lambda buffer, **kwargs: pd.read_hdf(buffer, key="data", **kwargs),
+    ".stata": pd.read_stata,
+    ".gbq": lambda buffer, **kwargs: pd.read_gbq(
+        buffer, "my_dataset.my_table", **kwargs
+    ),
+    ".parquet": _read_parquet,
+    ".f": pd.read_feather,
+    ".feather": pd.read_feather,
+}
+
+# Functions used to write a data frame to a bytes object, by file extension
+_DF_WRITERS = {
+    ".csv": lambda df, buffer, **kwargs: df.to_csv(buffer, **kwargs),
+    ".xlsx": lambda df, buffer, **kwargs: df.to_excel(
+        buffer, **{"engine": _EXCEL_WRITE_ENGINE, **kwargs}
+    ),
+    ".xls": lambda df, buffer, **kwargs: df.to_excel(buffer, **kwargs),
+    ".xlsm": lambda df, buffer, **kwargs: df.to_excel(buffer, **kwargs),
+    ".json": lambda df, buffer, **kwargs: df.to_json(buffer, **kwargs),
+    ".html": lambda df, buffer, **kwargs: df.to_html(buffer, **kwargs),
+    ".pkl": lambda df, buffer, **kwargs: df.to_pickle(
+        buffer, **{"protocol": _PICKLE_PROTOCOL, **kwargs}
+    ),
+    ".pickle": lambda df, buffer, **kwargs: df.to_pickle(
+        buffer, **{"protocol": _PICKLE_PROTOCOL, **kwargs}
+    ),
+    ".hdf": lambda df, buffer, **kwargs: df.to_hdf(buffer, key="data", **kwargs),
+    ".stata": lambda df, buffer, **kwargs: df.to_stata(buffer, **kwargs),
+    ".gbq": lambda df, buffer, **kwargs: df.to_gbq(
+        buffer, "my_dataset.my_table", **kwargs
+    ),
+    ".parquet": lambda df, buffer, **kwargs: df.to_parquet(
+        buffer, **_with_zstd(kwargs)
+    ),
+    ".f": lambda df, buffer, **kwargs: df.to_feather(buffer, **_with_zstd(kwargs)),
+    ".feather": lambda df, buffer, **kwargs: df.to_feather(
+        buffer, **_with_zstd(kwargs)
+    ),
+}
+
+# Functions used to read a downloaded blob into an Arrow table, by file extension
+_ARROW_READERS = {
+    ".parquet": pq.read_table,
+    ".f": feather.read_table,
+    ".feather": feather.read_table,
+}
+
+# Functions used to write an Arrow table to a bytes object, by file extension
+_ARROW_WRITERS = {
+    ".parquet": lambda table, buffer, **kwargs: pq.write_table(
+        table, buffer, **_with_zstd(kwargs)
+    ),
+    ".f": lambda table, buffer, **kwargs: feather.write_feather(
+        table, buffer, **_with_zstd(kwargs)
+    ),
+    ".feather": lambda table, buffer, **kwargs: feather.write_feather(
+        table, buffer, **_with_zstd(kwargs)
+    ),
+}
+
+# Functions used to serialize non-data frame objects to bytes, by file extension
+_OBJ_WRITERS = {
+    ".json": lambda obj: json.dumps(obj).encode("utf-8"),
+    ".pkl": lambda obj: pickle.dumps(obj, protocol=_PICKLE_PROTOCOL),
+    ".pickle": lambda obj: pickle.dumps(obj, protocol=_PICKLE_PROTOCOL),
+    ".txt": lambda obj: obj.encode("utf-8"),
+}
+
+
+def _download_to_buffer(
+    blob_client: BlobClient, max_concurrency: int
+) -> tempfile.SpooledTemporaryFile:
+    """
+    Streams a blob into a buffer which is kept in memory for small files
+    but spills over to disk for large ones, so that we never hold both the
+    raw bytes and the parsed object in memory at the same time.
+
+    Args:
+        blob_client (BlobClient): client for the blob to download
+        max_concurrency (int): number of parallel connections used
+        to download large blobs
+
+    Returns:
+        tempfile.SpooledTemporaryFile: buffer positioned at its start
+    """
+    downloader = blob_client.download_blob(max_concurrency=max_concurrency)
+    buffer = tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX_SIZE)
+    downloader.readinto(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def _read_buffer(buffer: IO[bytes], extension: str, **kwargs) -> Any:
+    """
+    Converts the contents of a downloaded blob into a Python object,
+    using the file extension to determine the function used to read data.
+
+    Args:
+        buffer (IO[bytes]): file-like object holding the blob's contents
+        extension (str): file extension of the blob, including the dot
+
+    Raises:
+        ValueError: if we try to read an unsupported file type
+
+    Returns:
+        Any: any object (if pickled), string (if txt), dict (if json) or
+        otherwise pandas.DataFrame
+    """
+    reader = _READERS.get(extension)
+    if reader is None:
+        raise ValueError(f"Unsupported file extension: {extension}")
+    return reader(buffer, **kwargs)
 
 
 def read_blob(
-    connection_string: str, container_name: str, blob_name: str, **kwargs
+    connection_string: str,
+    container_name: str,
+    blob_name: str,
+    max_concurrency: int = 8,
+    return_arrow: bool = False,
+    default_format: str = "parquet",
+    _client: BlobClient | None = None,
+    **kwargs,
 ) -> Any:
     """
     Imports a file stored in Azure blob storage into Python's memory.
@@ -21,55 +327,49 @@ def read_blob(
         by the get_access() function
         container_name (str): name of the container where the file is stored
         blob_name (str): path to the file inside the container itself
+        max_concurrency (int, optional): number of parallel connections
+        used to download large blobs. Defaults to 8.
+        return_arrow (bool, optional): whether to return parquet and feather
+        files as a pyarrow.Table instead of a pandas.DataFrame, which skips
+        the conversion to pandas altogether. Defaults to False.
+        default_format (str, optional): format of files whose blob name has
+        no extension (or a generic ".df" extension), as used by write_blob().
+        Defaults to "parquet".
+        _client (BlobClient, optional): client for the blob, if one has
+        already been created (used internally to avoid creating it twice).
+        Defaults to None.
 
     Raises:
         ValueError: if we try to read an unsupported file type
 
     Returns:
-        Any: any object (if pickled), string (if txt), dict (if json) or
-        otherwise pandas.DataFrame
+        Any: any object (if pickled), string (if txt), dict (if json),
+        pyarrow.Table (if "return_arrow" is True) or otherwise pandas.DataFrame
     """
     # We use the file extension to determine the function used to read data
-    _, extension = os.path.splitext(blob_name)
-
-    # We download the blob as a Python object
-    blob_service_client = BlobServiceClient.from_connection_string(connection_string)
-    blob_client = blob_service_client.get_blob_client(container_name, blob_name)
-    obj = blob_client.download_blob().readall()
-
-    # For non-data frame objects, we handle json, pickle and txt files
-    # (if a pickle file is a df, it will directly be imported as such)
-    if extension == ".txt":
-        conv_obj = obj.decode("utf-8")
-    elif extension in [".pkl", ".pickle"]:
-        conv_obj = pickle.load(io.BytesIO(obj))
-    elif extension == ".json":
-        conv_obj = json.loads(obj.decode("utf8"))
-    # For objects assumed to be pandas df, we auto detect the file type
-    # from the file extension and then call the appropriate pandas.read_X() fn
-    elif extension == ".csv":
-        conv_obj = pd.read_csv(io.BytesIO(obj), **kwargs)
-    elif extension in [".xlsx", ".xls", ".xlsm"]:
-        conv_obj = pd.read_excel(io.BytesIO(obj), **kwargs)
-    elif extension == ".html":
-        conv_obj = pd.read_html(io.BytesIO(obj), **kwargs)
-    elif extension == ".hdf":
-        conv_obj = pd.read_hdf(io.BytesIO(obj), key="data", **kwargs)
-    elif extension == ".stata":
-        conv_obj = pd.read_stata(io.BytesIO(obj), **kwargs)
-    elif extension == ".gbq":
-        conv_obj = pd.read_gbq(io.BytesIO(obj), "my_dataset.my_table", **kwargs)
-    elif extension == ".parquet":
-        conv_obj = pd.read_parquet(io.BytesIO(obj), **kwargs)
-    elif extension in [".f", ".feather"]:
-        conv_obj = pd.read_feather(io.BytesIO(obj), **kwargs)
-    # For all other objects, we raise an error, though in theory, we could also
-    # enable the direct import to a bytes IO object
-    else:
-        raise ValueError(f"Unsupported file extension: {extension}")
-    # else:
-    #    conv_obj = io.BytesIO(obj)
-    return conv_obj
+    extension = _get_extension(blob_name, default_format)
+    if return_arrow and extension not in _ARROW_READERS:
+        raise ValueError(
+            f"Unsupported file extension for reading Arrow tables: {extension}"
+        )
+
+    # We download the blob and convert it to the relevant Python object
+    blob_client = _client or _get_blob_client(
+        connection_string, container_name, blob_name
+    )
+
+    # Text and json files are decoded straight to a string by the SDK, as
+    # they are typically small and gain nothing from being buffered first
+    if extension in _TEXT_READERS:
+        text = blob_client.download_blob(
+            max_concurrency=max_concurrency, encoding="utf-8"
+        ).readall()
+        return _TEXT_READERS[extension](text)
+
+    with _download_to_buffer(blob_client, max_concurrency) as buffer:
+        if return_arrow:
+            return _ARROW_READERS[extension](buffer, **kwargs)
+        return _read_buffer(buffer, extension, **kwargs)
 
 
 def write_blob(
@@ -78,75 +378,86 @@ def write_blob(
     container_name: str,
     blob_name: str,
     overwrite: bool = True,
+    max_concurrency: int = 8,
+    default_format: str = "parquet",
+    _client: BlobClient | None = None,
     **kwargs,
 ) -> None:
     """_summary_
 
     Args:
         obj (Any): any object (if pickled), string (if txt), dict (if json) or
-        otherwise pandas.DataFrame
+        otherwise pandas.DataFrame (or pyarrow.Table for parquet and feather)
         connection_string (str): connection string in the format provided
         by the get_access() function
         container_name (str): name of the container where the file is stored
         blob_name (str): path to the file inside the container itself
         overwrite (bool, optional): whether or not to overwrite the original
         file contained in the blob (if it exists). Defaults to True.
+        max_concurrency (int, optional): number of parallel connections
+        used to upload large blobs. Defaults to 8.
+        default_format (str, optional): format used to store data frames
+        whose blob name has no extension (or a generic ".df" extension);
+        the blob name itself is kept as given. Defaults to "parquet".
+        _client (BlobClient, optional): client for the blob, if one has
+        already been created (used internally to avoid creating it twice).
+        Defaults to None.
 
     Raises:
         ValueError: if we try to write to an unsupported file type
     """
-    # We use the file extension to determine the function used to write data
-    _, extension = os.path.splitext(blob_name)
-    conv_obj = io.BytesIO()
+    # We use the file extension to determine the function used to write data;
+    # data frames without a specific file extension are stored in a columnar
+    # format, which is both smaller and much faster to read than CSV/Excel
+    is_arrow = type(obj) is pa.Table
+    is_df = is_arrow or type(obj) is pd.DataFrame
+    extension = _get_extension(blob_name, default_format if is_df else None)
+
+    # We upload the blob object to the cloud through this client
+    blob_client = _client or _get_blob_client(
+        connection_string, container_name, blob_name
+    )
 
-    if type(obj) is pd.DataFrame:
+    if is_df:
         # For data frames, we auto detect the file type from the extension
-        # and use the appropriate pandas.to_X() function to write the file
-        if extension == ".csv":
-            obj.to_csv(conv_obj, **kwargs)
-        elif extension in [".xlsx", ".xls", ".xlsm"]:
-            obj.to_excel(conv_obj, **kwargs)
-        elif extension == ".json":
-            obj.to_json(conv_obj, **kwargs)
-        elif extension == ".html":
-            obj.to_html(conv_obj, **kwargs)
-        elif extension in [".pkl", ".pickle"]:
-            obj.to_pickle(conv_obj, **kwargs)
-        elif extension == ".hdf":
-            obj.to_hdf(conv_obj, key="data", **kwargs)
-        elif extension == ".stata":
-            obj.to_stata(conv_obj, **kwargs)
-        elif extension == ".gbq":
-            obj.to_gbq(conv_obj, "my_dataset.my_table", **kwargs)
-        elif extension == ".parquet":
-            obj.to_parquet(conv_obj, **kwargs)
-        elif extension in [".f", ".feather"]:
-            obj.to_feather(conv_obj, **kwargs)
-        else:
+        # and use the appropriate pandas.to_X() function to write the file;
+        # Arrow tables are written directly by pyarrow instead, without any
+        # conversion to pandas (only parquet and feather files are supported)
+        writer = (_ARROW_WRITERS if is_arrow else _DF_WRITERS).get(extension)
+        if writer is None:
+            obj_type = "Arrow tables" if is_arrow else "data frame objects"
             raise ValueError(
-                f"Unsupported file extension for storing data frame objects: {extension}"
+                f"Unsupported file extension for storing {obj_type}: {extension}"
+            )
+
+        # (the output is kept in memory for small files but spills over
+        # to disk for large ones, which keeps memory use bounded)
+        with tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX_SIZE) as conv_obj:
+            writer(obj, conv_obj, **kwargs)
+
+            # We reset the file object as it is necessary before writing
+            length = conv_obj.tell()
+            conv_obj.seek(0)
+
+            # (passing the length explicitly saves the SDK from probing the
+            # stream, which would force a spooled file over to disk)
+            blob_client.upload_blob(
+                conv_obj,
+                overwrite=overwrite,
+                max_concurrency=max_concurrency,
+                length=length,
             )
     else:
-        # For non-data frame objects, we handle .json, .pickle and .txt files
-        if extension == ".json":
-            json_obj = json.dumps(obj)
-            conv_obj.write(json_obj.encode("utf-8"))
-        elif extension in [".pkl", ".pickle"]:
-            pickle.dump(obj, conv_obj)
-        elif extension == ".txt":
-            conv_obj.write(obj.encode("utf-8"))
-        else:
+        # For non-data frame objects, we handle .json, .pickle and .txt files;
+        # these are serialized straight to bytes which can be uploaded as-is
+        serializer = _OBJ_WRITERS.get(extension)
+        if serializer is None:
             raise ValueError(
                 f"Unsupported file extension for storing non-data frame objects: {extension}"
             )
-
-    # We reset bytes object as it is necessary before writing
-    conv_obj.seek(0)
-
-    # We upload the blob object to the cloud
-    blob_service_client = BlobServiceClient.from_connection_string(connection_string)
-    blob_client = blob_service_client.get_blob_client(container_name, blob_name)
-    blob_client.upload_blob(conv_obj, overwrite=overwrite)
+        blob_client.upload_blob(
+            serializer(obj), overwrite=overwrite, max_concurrency=max_concurrency
+        )
 
 
 def append_to_blob(
@@ -155,6 +466,7 @@ def append_to_blob(
     container_name: str,
     blob_name: str,
     id_vars: list = [],
+    default_format: str = "parquet",
 ) -> None:
     """
     Takes a pandas dataframe containing model outputs and appends
@@ -170,26 +482,41 @@ def append_to_blob(
         blob_name (str): name of the file as stored in Azure
         id_vars (list): variables identifying unique rows to avoid
         saving duplicate entries to Azure (none by default)
+        default_format (str, optional): format of the file if its blob name
+        has no extension (see write_blob()). Defaults to "parquet".
     """
 
-    # Create a blob client using the local blob_name as name
-    blob_service_client = BlobServiceClient.from_connection_string(connection_string)
-    blob_client = blob_service_client.get_blob_client(container_name, blob_name)
+    # Create a blob client using the local blob_name as name, which is
+    # shared by both the download and the upload below
+    blob_client = _get_blob_client(connection_string, container_name, blob_name)
 
-    # Check if the blob exists
-    if blob_client.exists():
-        # Importing data previously uploaded to Azure
-        old_data = read_blob(connection_string, container_name, blob_name)
-
-        # Unifying previously uploaded data with new data and making sure
-        # we don't keep any duplicate entries in Azure
-        local_df = pd.concat([local_df, old_data])
+    # Importing data previously uploaded to Azure, if any (rather than first
+    # checking whether the blob exists, we simply try to download it)
+    try:
+        old_data = read_blob(
+            connection_string,
+            container_name,
+            blob_name,
+            default_format=default_format,
+            _client=blob_client,
+        )
+    except ResourceNotFoundError:
+        old_data = None
 
+    if old_data is not None:
         # Making sure we don't have duplicate rows in Azure, if ID vars are
-        # specified by the user
+        # specified by the user: new rows take precedence, so we only keep
+        # those previously uploaded rows whose IDs are neither among the new
+        # ones nor among the previously uploaded rows before them (ID vars
+        # missing from the previously uploaded data count as empty)
         if id_vars:
-            local_df.drop_duplicates(subset=id_vars, inplace=True)
-            local_df.reset_index(inplace=True, drop=True)
+            local_df = local_df.drop_duplicates(subset=id_vars)
+            new_ids = pd.MultiIndex.from_frame(local_df[id_vars])
+            old_ids = pd.MultiIndex.from_frame(old_data.reindex(columns=id_vars))
+            old_data = old_data[~old_ids.isin(new_ids) & ~old_ids.duplicated()]
+
+        # Unifying previously uploaded data with new data
+        local_df = pd.concat([local_df, old_data], ignore_index=bool(id_vars))
 
     # Exporting to a parquet file
     write_blob(
@@ -197,11 +524,19 @@ def append_to_blob(
         connection_string,
         container_name,
         blob_name,
+        default_format=default_format,
+        _client=blob_client,
     )
 
 
 def filter_blob(
-    connection_string: str, container_name: str, blob_name: str, filters: dict, **kwargs
+    connection_string: str,
+    container_name: str,
+    blob_name: str,
+    filters: dict,
+    default_format: str = "parquet",
+    _client: BlobClient | None = None,
+    **kwargs,
 ) -> None:
     """
     Downloads a file from Azure blob storage, filters the data by multiple columns
@@ -214,31 +549,75 @@ def filter_blob(
         container_name (str): name of the container where the file is stored
         blob_name (str): path to the file inside the container itself
         filters (dict): dictionary of column names and corresponding lists of acceptable values
+        default_format (str, optional): format of the file if its blob name
+        has no extension (see write_blob()). Defaults to "parquet".
+        _client (BlobClient, optional): client for the blob, if one has
+        already been created (used internally to avoid creating it twice).
+        Defaults to None.
     """
 
     # Create a blob client using the local blob_name as name
-    blob_service_client = BlobServiceClient.from_connection_string(connection_string)
-    blob_client = blob_service_client.get_blob_client(container_name, blob_name)
-
-    # Check if the blob exists
-    if blob_client.exists():
-        # Importing data previously uploaded to Azure
-        df = read_blob(connection_string, container_name, blob_name, **kwargs)
-
-        # Filter the data by multiple columns so that it only keeps
-        # values in the corresponding lists of acceptable values
-        for column, acceptable_values in filters.items():
-            df = df[df[column].isin(acceptable_values)]
-
-        # Exporting to a parquet file
-        write_blob(
-            df,
-            connection_string,
-            container_name,
-            blob_name,
-        )
-    else:
+    blob_client = _client or _get_blob_client(
+        connection_string, container_name, blob_name
+    )
+
+    # Importing data previously uploaded to Azure (rather than first checking
+    # whether the blob exists, we simply try to download it)
+    try:
+        buffer = _download_to_buffer(blob_client, max_concurrency=8)
+    except ResourceNotFoundError:
         print(f"The blob {blob_name} does not exist in the container {container_name}.")
+        return
+
+    # We keep track of the number of rows the data originally had
+    extension = _get_extension(blob_name, default_format)
+    with buffer:
+        # For parquet files, the filters are pushed down to the parquet
+        # reader so that row groups without acceptable values are never
+        # decoded; the original row count is read from the file's footer
+        # Note: filters that pyarrow can't apply the way pandas does (e.g.
+        # strings for a timestamp column) are only applied by pandas below
+        if extension == ".parquet":
+            metadata = pq.read_metadata(buffer)
+            n_rows = metadata.num_rows
+            schema = metadata.schema.to_arrow_schema()
+            buffer.seek(0)
+            pushdown = [
+                (column, "in", list(acceptable_values))
+                for column, acceptable_values in filters.items()
+                if column in schema.names
+                and _can_push_down(
+                    list(acceptable_values), schema.field(column).type
+                )
+            ]
+            if pushdown:
+                kwargs["filters"] = pushdown
+        df = _read_buffer(buffer, extension, **kwargs)
+    if extension != ".parquet":
+        n_rows = len(df)
+
+    # Filter the data by multiple columns so that it only keeps
+    # values in the corresponding lists of acceptable values
+    # (for parquet files, this only applies to the rows that are left);
+    # the conditions are combined into one mask so the df is sliced once
+    mask = np.ones(len(df), dtype=bool)
+    for column, acceptable_values in filters.items():
+        mask &= df[column].isin(acceptable_values).to_numpy()
+    df = df[mask]
+
+    # If no rows were removed, there is no need to re-upload the data
+    if len(df) == n_rows:
+        return
+
+    # Exporting to a parquet file
+    write_blob(
+        df,
+        connection_string,
+        container_name,
+        blob_name,
+        default_format=default_format,
+        _client=blob_client,
+    )
 
 
 def delete_blob_if_exists(
@@ -255,10 +634,7 @@ def delete_blob_if_exists(
         blob_name (str): path to the file inside the container itself
     """
     try:
-        blob_service_client = BlobServiceClient.from_connection_string(
-            connection_string
-        )
-        blob_client = blob_service_client.get_blob_client(container_name, blob_name)
+        blob_client = _get_blob_client(connection_string, container_name, blob_name)
 
         if blob_client.exists():
             blob_client.delete_blob()
@@ -270,4 +646,71 @@ def delete_blob_if_exists(
         print(f"An exception occurred: {e}")
 
 
+def _is_transient(error: Exception) -> bool:
+    """
+    Checks whether an error raised while calling Azure is likely to go away
+    when trying again, i.e. connection problems, throttling or server errors.
+
+    Args:
+        error (Exception): the error raised
+
+    Returns:
+        bool: transient or not
+    """
+    if isinstance(error, (ServiceRequestError, ServiceResponseError)):
+        return True
+    return isinstance(error, HttpResponseError) and (
+        error.status_code == 429 or (error.status_code or 0) >= 500
+    )
+
+
+def bulk_apply(
+    connection_string: str,
+    container_name: str,
+    blob_names: list,
+    fn: Callable,
+    max_workers: int = 16,
+    retries: int = 3,
+    **kwargs,
+) -> list:
+    """
+    Applies one of the blob functions in this module (e.g. read_blob(),
+    filter_blob() or delete_blob_if_exists()) to several blobs in the same
+    container at once. Calls are run in parallel in a pool of threads and
+    calls failing due to connection problems, throttling or server errors
+    are retried with an exponential backoff (other errors are raised
+    straight away).
+
+    Args:
+        connection_string (str): connection string in the format provided
+        by the get_access() function
+        container_name (str): name of the container where the files are stored
+        blob_names (list): paths to the files inside the container itself
+        fn (Callable): function taking the connection string, container name
+        and blob name as its first three arguments
+        max_workers (int, optional): maximum number of blobs processed
+        at the same time. Defaults to 16.
+        retries (int, optional): number of times a failed call is retried
+        for each blob before giving up. Defaults to 3.
+        **kwargs: any further keyword arguments to pass on to "fn"
+
+    Returns:
+        list: the values returned by "fn" for each blob, in the same
+        order as "blob_names"
+    """
+
+    def _apply_with_retry(blob_name: str) -> Any:
+        for attempt in range(retries + 1):
+            try:
+                return fn(connection_string, container_name, blob_name, **kwargs)
+            except Exception as error:
+                if attempt == retries or not _is_transient(error):
+                    raise
+                time.sleep(2**attempt)
+
+    # All workers share the same cached service client and its connections
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_apply_with_retry, blob_names))
+
+
 # %%
@@ -1,9 +1,173 @@
 import pandas as pd
 import numpy as np
+import threading
+import weakref
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterable
+from requests.adapters import HTTPAdapter
 from azure.cosmosdb.table.tableservice import TableService
 from azure.cosmosdb.table.models import Entity
 from azure.cosmosdb.table.tablebatch import TableBatch
 
+# Maximum number of entities in a single batch (a limit set by Azure)
+_MAX_BATCH_SIZE = 100
+
+# Names of the tables known to exist, by table service; only positive
+# results are remembered, since a missing table may be created elsewhere
+# at any time (entries disappear together with their table service)
+_existing_tables = weakref.WeakKeyDictionary()
+
+
+def _set_pool_size(table_service: TableService, pool_size: int) -> None:
+    """
+    Makes sure the HTTP session used by a table service can keep at least
+    "pool_size" connections open at once, so that parallel requests don't
+    have to wait for a free connection (or open a new one every time).
+    Only the connection pools of the mounted adapters are resized, so any
+    other settings of the session are kept as they are.
+
+    Args:
+        table_service (TableService): Azure table service object
+        pool_size (int): number of connections to allow
+    """
+    for prefix in ["https://", "http://"]:
+        adapter = table_service.request_session.get_adapter(prefix)
+        if isinstance(adapter, HTTPAdapter) and adapter._pool_maxsize < pool_size:
+            adapter.poolmanager.clear()
+            adapter.init_poolmanager(pool_size, pool_size, block=adapter._pool_block)
+
+
+def configure_table_service(
+    table_service: TableService, pool_size: int = 25
+) -> TableService:
+    """
+    Tunes the HTTP session used by a table service for many (parallel)
+    requests, so that up to "pool_size" connections are kept open and
+    reused. Table services obtained through the get_access() function are
+    already configured this way.
+
+    Args:
+        table_service (TableService): Azure table service object
+        pool_size (int): number of connections to keep open (25 by default)
+
+    Returns:
+        TableService: the same table service object
+    """
+    _set_pool_size(table_service, pool_size)
+    return table_service
+
+
+def _run_in_parallel(fn: Callable, items: Iterable, max_workers: int) -> None:
+    """
+    Calls a function on each of the items using a pool of threads, which
+    speeds up operations that send one HTTP request per item. If one of the
+    calls raises an error, no further calls are started and the error is
+    raised again once the calls already running have finished.
+
+    Note: only a limited number of items are waiting to be processed at any
+    time (and nothing is kept of the finished ones), so when the items come
+    from a generator (e.g. query results that are downloaded page by page),
+    the first items are processed while the rest are still being produced
+    and memory use doesn't grow with the number of items
+
+    Args:
+        fn (Callable): function to call on each item
+        items (Iterable): items to call the function on
+        max_workers (int): maximum number of calls made at the same time
+    """
+    pending = threading.BoundedSemaphore(2 * max_workers)
+    errors = []
+
+    def _on_done(future: Future) -> None:
+        if future.exception() is not None:
+            errors.append(future.exception())
+        pending.release()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for item in items:
+            pending.acquire()
+            if errors:
+                break
+            executor.submit(fn, item).add_done_callback(_on_done)
+    if errors:
+        raise errors[0]
+
+
+def _chunk_by_partition(entities: Iterable) -> Iterable[list]:
+    """
+    Splits entities into chunks of up to 100 entities with the same
+    partition key. A chunk is yielded as soon as it is full, so the entities
+    don't need to be sorted or grouped by partition key beforehand.
+
+    Args:
+        entities (Iterable): entities to split into chunks
+
+    Returns:
+        Iterable[list]: lists of entities with the same partition key
+    """
+    pending = defaultdict(list)
+    for entity in entities:
+        chunk = pending[entity["PartitionKey"]]
+        chunk.append(entity)
+        if len(chunk) == _MAX_BATCH_SIZE:
+            yield chunk
+            del pending[entity["PartitionKey"]]
+    yield from pending.values()
+
+
+def _commit_in_batches(
+    table_service: TableService,
+    table_name: str,
+    entities: Iterable,
+    add_to_batch: Callable,
+    max_workers: int,
+) -> None:
+    """
+    Commits operations on entities in batches of up to 100 entities with the
+    same partition key (as required by Azure). The batches are independent
+    of each other, so several of them are committed at the same time, while
+    the remaining entities are still being read.
+
+    Args:
+        table_service (TableService): Azure table service object
+        table_name (str): name of the table to commit the batches to
+        entities (Iterable): entities to include in the batches
+        add_to_batch (Callable): function adding the operation for a single
+        entity to a batch, called as add_to_batch(batch, entity)
+        max_workers (int): maximum number of batches committed at the same time
+    """
+
+    def _commit(entities: list) -> None:
+        batch = TableBatch()
+        for entity in entities:
+            add_to_batch(batch, entity)
+        table_service.commit_batch(table_name, batch)
+
+    _set_pool_size(table_service, max_workers)
+    _run_in_parallel(_commit, _chunk_by_partition(entities), max_workers)
+
+
+def _iter_df_rows(df: pd.DataFrame) -> Iterable[dict]:
+    """
+    Yields the rows of a pandas dataframe as table entities. These are plain
+    dicts rather than Entity objects, which the Azure SDK accepts just as
+    well when inserting entities.
+
+    Note: rows are built from one list per column, which is much faster than
+    df.to_dict("records") or df.itertuples() while still giving native
+    Python values (as required by the Azure SDK)
+
+    Args:
+        df (pd.DataFrame): pandas df to get the rows from
+
+    Returns:
+        Iterable[dict]: one entity per row in the df
+    """
+    columns = list(df.columns)
+    for values in zip(*(df[column].tolist() for column in columns)):
+        yield dict(zip(columns, values))
+
 
 def table_exists(table_service: TableService, table_name: str) -> bool:
     """
@@ -16,7 +180,12 @@ def table_exists(table_service: TableService, table_name: str) -> bool:
     Returns:
         bool: exists or not
     """
-    return table_service.exists(table_name)
+    if table_name in _existing_tables.get(table_service, ()):
+        return True
+    if table_service.exists(table_name):
+        _existing_tables.setdefault(table_service, set()).add(table_name)
+        return True
+    return False
 
 
 def create_table(table_service: TableService, table_name: str) -> None:
@@ -30,6 +199,7 @@ def create_table(table_service: TableService, table_name: str) -> None:
     """
     if not table_exists(table_service, table_name):
         table_service.create_table(table_name)
+        _existing_tables.setdefault(table_service, set()).add(table_name)
     else:
         print(f"Table '{table_name}' already exists. Please choose a different name.")
 
@@ -42,6 +212,7 @@ def delete_table_if_exists(table_service: TableService, table_name: str) -> None
         table_service (TableService): Azure table service object
         table_name (str): name of the table we want to delete
     """
+    _existing_tables.get(table_service, set()).discard(table_name)
     if table_service.exists(table_name):
         table_service.delete_table(table_name)
 
@@ -88,30 +259,56 @@ def query_entities(
     """
     entities = table_service.query_entities(table_name, filter=filter_expression)
     if return_df:
-        entities = pd.DataFrame(entities)
+        # We build one list per column while going through the entities,
+        # which is faster and uses less memory than building the df from a
+        # list of dicts (entities lacking a column get None in that column)
+        columns = {}
+        n_rows = 0
+        for entity in entities:
+            for key, value in entity.items():
+                column = columns.setdefault(key, [])
+                if len(column) < n_rows:
+                    column.extend([None] * (n_rows - len(column)))
+                column.append(value)
+            n_rows += 1
+        for column in columns.values():
+            column.extend([None] * (n_rows - len(column)))
+        entities = pd.DataFrame(columns)
     return entities
 
 
-def delete_all_rows(table_service: TableService, table_name: str) -> None:
+def delete_all_rows(
+    table_service: TableService, table_name: str, max_workers: int = 25
+) -> None:
     """
-    Deletes all rows in an Azure DLS table one by one.
-    Only suitable for use with smaller table sizes, else too slow.
+    Deletes all rows in an Azure DLS table one by one (though several rows
+    are deleted at the same time). Only suitable for use with smaller table
+    sizes, else too slow.
 
     Args:
         table_service (TableService): Azure table service object
         table_name (str): name of the table where we want to delete all rows
+        max_workers (int): maximum number of rows deleted at the same time
+        (25 by default)
     """
-    # Query all entities in the table
-    entities = table_service.query_entities(table_name)
+    # Query the keys of all entities in the table (the other properties
+    # aren't needed to delete them)
+    entities = table_service.query_entities(table_name, select="PartitionKey,RowKey")
 
     # Delete each entity
-    for entity in entities:
-        table_service.delete_entity(
+    _set_pool_size(table_service, max_workers)
+    _run_in_parallel(
+        lambda entity: table_service.delete_entity(
             table_name, entity["PartitionKey"], entity["RowKey"]
-        )
+        ),
+        entities,
+        max_workers,
+    )
 
 
-def delete_all_rows_batch(table_service: TableService, table_name: str) -> None:
+def delete_all_rows_batch(
+    table_service: TableService, table_name: str, max_workers: int = 25
+) -> None:
     """
     Deletes all rows in an Azure DLS table by using batches
     to speed up the process.
@@ -119,35 +316,25 @@ def delete_all_rows_batch(table_service: TableService, table_name: str) -> None:
     Args:
         table_service (TableService): Azure table service object
         table_name (str): name of the table where we want to delete all rows
+        max_workers (int): maximum number of batches committed at the
+        same time (25 by default)
     """
-    # Query all entities in the table
-    entities = table_service.query_entities(table_name)
-
-    # Initialize a new batch
-    batch = TableBatch()
-
-    # Track the current PartitionKey
-    current_partition_key = None
-
-    # Track the number of entities in the current batch
-    batch_count = 0
-
-    for entity in entities:
-        # If the PartitionKey changes or the batch size reaches 100, commit the current batch and start a new one
-        if current_partition_key != entity["PartitionKey"] or batch_count == 100:
-            if current_partition_key is not None:
-                table_service.commit_batch(table_name, batch)
-            batch = TableBatch()
-            current_partition_key = entity["PartitionKey"]
-            batch_count = 0
-
-        # Add the delete operation to the batch
-        batch.delete_entity(entity["PartitionKey"], entity["RowKey"])
-        batch_count += 1
-
-    # Commit the last batch if it has any entities
-    if batch_count > 0:
-        table_service.commit_batch(table_name, batch)
+    # Query the keys of all entities in the table (the other properties
+    # aren't needed to delete them)
+    entities = table_service.query_entities(table_name, select="PartitionKey,RowKey")
+
+    # Delete the entities in batches of up to 100 entities each (with the
+    # same partition key, as the query results are not necessarily sorted
+    # by partition key)
+    _commit_in_batches(
+        table_service,
+        table_name,
+        entities,
+        lambda batch, entity: batch.delete_entity(
+            entity["PartitionKey"], entity["RowKey"]
+        ),
+        max_workers,
+    )
 
 
 def write_df_to_azure_table(
@@ -155,6 +342,7 @@ def write_df_to_azure_table(
     table_name: str,
     df: pd.DataFrame,
     truncate: bool = False,
+    assume_exists: bool = False,
 ) -> None:
     """
     Appends all rows from a pandas dataframe to an Azure DLS table.
@@ -167,21 +355,21 @@ def write_df_to_azure_table(
         df (pd.DataFrame): pandas df to get the rows from
         truncate (bool): whether to delete all rows from the existing
         table (if it exists) before appending new data.
+        assume_exists (bool): whether to skip creating the table (if it
+        doesn't exist), which saves a request when writing repeatedly to a
+        table that is known to exist (defaults to False)
     """
-    # If table does not exist, we need to create it first
-    if not table_exists(table_service, table_name):
-        create_table(table_service, table_name)
+    # If table is not known to exist, we need to create it first (the SDK simply
+    # does nothing if it already exists, which saves us checking beforehand)
+    known_tables = _existing_tables.setdefault(table_service, set())
+    if not assume_exists and table_name not in known_tables:
+        table_service.create_table(table_name, fail_on_exist=False)
+        known_tables.add(table_name)
     # Delete all rows if so specified
     if truncate:
         delete_all_rows_batch(table_service, table_name)
     # For existing tables, we simply append the rows
-    data = df.to_dict("records")
-    for row in data:
-        entity = Entity()
-        entity.PartitionKey = row["PartitionKey"]
-        entity.RowKey = row["RowKey"]
-        for key, value in row.items():
-            setattr(entity, key, value)
+    for entity in _iter_df_rows(df):
         table_service.insert_entity(table_name, entity)
 
 
@@ -190,11 +378,14 @@ def write_df_to_azure_table_batch(
     table_name: str,
     df: pd.DataFrame,
     truncate: bool = False,
+    assume_exists: bool = False,
+    max_workers: int = 25,
 ) -> None:
     """
     Appends all rows from a pandas dataframe to an Azure DLS table.
     Does this using batches, which speeds up the process when working
-    with larger data tables.
+    with larger data tables. Rows with different partition keys go into
+    separate batches, several of which are committed at the same time.
 
     Args:
         table_service (TableService): Azure table service object
@@ -202,33 +393,30 @@ def write_df_to_azure_table_batch(
         df (pd.DataFrame): pandas df to get the rows from
         truncate (bool): whether to delete all rows from the existing
         table (if it exists) before appending new data.
+        assume_exists (bool): whether to skip creating the table (if it
+        doesn't exist), which saves a request when writing repeatedly to a
+        table that is known to exist (defaults to False)
+        max_workers (int): maximum number of batches committed at the
+        same time (25 by default)
     """
-    # If table does not exist, we need to create it first
-    if not table_exists(table_service, table_name):
-        create_table(table_service, table_name)
+    # If table is not known to exist, we need to create it first (the SDK simply
+    # does nothing if it already exists, which saves us checking beforehand)
+    known_tables = _existing_tables.setdefault(table_service, set())
+    if not assume_exists and table_name not in known_tables:
+        table_service.create_table(table_name, fail_on_exist=False)
+        known_tables.add(table_name)
     # Delete all rows if so specified
     if truncate:
         delete_all_rows_batch(table_service, table_name)
-    # For existing tables, we simply append the rows
-    data = df.to_dict("records")
-    batch = TableBatch()
-    batch_count = 0  # Keep track of the number of entities in the batch
-    for i, row in enumerate(data):
-        entity = Entity()
-        entity.PartitionKey = row["PartitionKey"]
-        entity.RowKey = row["RowKey"]
-        for key, value in row.items():
-            setattr(entity, key, value)
-        batch.insert_entity(entity)
-        batch_count += 1  # Increment the count
-        if (
-            batch_count == 100
-        ):  # If the batch size reaches 100, commit the batch and start a new one
-            table_service.commit_batch(table_name, batch)
-            batch = TableBatch()
-            batch_count = 0  # Reset the count
-    if batch_count > 0:  # Commit the last batch if it has any entities
-        table_service.commit_batch(table_name, batch)
+    # For existing tables, we simply append the rows in batches of up to
+    # 100 rows each (with the same partition key)
+    _commit_in_batches(
+        table_service,
+        table_name,
+        _iter_df_rows(df),
+        lambda batch, entity: batch.insert_entity(entity),
+        max_workers,
+    )
 
 
 def add_keys_to_df(df: pd.DataFrame, partition_key: str) -> pd.DataFrame:
@@ -237,7 +425,8 @@ def add_keys_to_df(df: pd.DataFrame, partition_key: str) -> pd.DataFrame:
     as well as a row key based on the partition key and the
     row number. This is one possible implementation of what
     needs to be done before a dataframe can be uploaded to
-    Azure tables.
+    Azure tables. If the df already has unique row keys and the
+    given partition key, it is returned unchanged.
 
     Args:
         df (pd.DataFrame): df that needs keys to be added
@@ -248,114 +437,184 @@ def add_keys_to_df(df: pd.DataFrame, partition_key: str) -> pd.DataFrame:
         pd.DataFrame: _description_
     """
 
+    # Nothing to do if the keys have already been added and are still valid
+    # (rows combined from several keyed dfs may have duplicate row keys)
+    if (
+        "PartitionKey" in df.columns
+        and "RowKey" in df.columns
+        and (df["PartitionKey"] == partition_key).all()
+        and df["RowKey"].is_unique
+    ):
+        return df
+
+    # Row keys are built in a single vectorized pass over the row numbers
     max_digits = len(str(len(df)))
+    row_numbers = np.arange(len(df)).astype(f"<U{max_digits}")
+    if len(df) > 0:  # (numpy's zfill fails on empty arrays)
+        row_numbers = np.char.zfill(row_numbers, max_digits)
     df["PartitionKey"] = partition_key
-    df["RowKey"] = np.arange(len(df))
-    df["RowKey"] = df["RowKey"].astype(str).str.zfill(max_digits)
-    df["RowKey"] = df["PartitionKey"] + "-" + df["RowKey"]
+    df["RowKey"] = np.char.add(f"{partition_key}-", row_numbers)
     return df
 
 
-def rename_table(table_service: TableService, old_name: str, new_name: str) -> None:
+def rename_table(
+    table_service: TableService, old_name: str, new_name: str, max_workers: int = 25
+) -> None:
     """
     Renames an Azure table. In reality, the process is more complicated
     than that: first, we need to create a new table; then, we need to copy
     all entities from the existing table to the new one and finally, we
-    need to delete the old Azure table. This process cannot be done using
-    batches, which is why the process may take a long time for large tables.
+    need to delete the old Azure table. The entities are copied in batches,
+    though the process may still take a while for large tables.
 
     Args:
         table_service (TableService): Azure table service object
         old_name (str): name of the existing Azure table
         new_name (str): new name for the Azure table
+        max_workers (int): maximum number of batches committed at the
+        same time (25 by default)
     """
     # Create a new table with the new name
     # Note: if table already exists, it will be deleted!
     delete_table_if_exists(table_service, new_name)
     create_table(table_service, new_name)
 
-    # Query all entities from the old table
-    entities = query_entities(table_service, old_name)
-    entities.drop(columns=["Timestamp"], inplace=True)
-    # print(entities.head(4))
+    def _insert(batch: TableBatch, entity: Entity) -> None:
+        # Drop the system properties that cannot be inserted into a table
+        entity.pop("Timestamp", None)
+        entity.pop("etag", None)
+        batch.insert_entity(entity)
 
-    # Insert all entities into the new table
-    write_df_to_azure_table(table_service, new_name, entities, True)
+    # Insert all entities from the old table into the new table in batches
+    # Note: batches are committed while the next pages of entities are
+    # still being downloaded from the old table
+    _commit_in_batches(
+        table_service,
+        new_name,
+        table_service.query_entities(old_name),
+        _insert,
+        max_workers,
+    )
 
     # Delete the old table
     delete_table_if_exists(table_service, old_name)
 
 
 def copy_column(
-    table_service: TableService, table_name: str, old_column: str, new_column: str
+    table_service: TableService,
+    table_name: str,
+    old_column: str,
+    new_column: str,
+    max_workers: int = 25,
 ) -> None:
     """
     Copies a column in all entities in an Azure table.
     This process cannot be done using batches, which is why the
-    process may take a long time for large tables.
+    process may take a long time for large tables (though several
+    entities are updated at the same time).
 
     Args:
         table_service (TableService): Azure table service object
         table_name (str): name of the Azure table
         old_column (str): name of the column to copy
         new_column (str): name of the new column
+        max_workers (int): maximum number of entities updated at the
+        same time (25 by default)
     """
-    # Query all entities from the table
-    entities = table_service.query_entities(table_name)
-
-    for entity in entities:
-        # Check if the entity has the column
-        if old_column in entity:
-            # Create a new entity with the new column
-            new_entity = entity.copy()
-            new_entity[new_column] = new_entity[old_column]
-
-            # Replace the old entity with the new one
-            table_service.update_entity(table_name, new_entity)
+    # Query the keys and the column to copy from all entities in the table
+    entities = table_service.query_entities(
+        table_name, select=f"PartitionKey,RowKey,{old_column}"
+    )
+
+    def _copy(entity: Entity) -> None:
+        # Merge only the new column into the existing entity, so that we
+        # don't need to send all the other columns to Azure as well
+        patch = {
+            "PartitionKey": entity["PartitionKey"],
+            "RowKey": entity["RowKey"],
+            new_column: entity[old_column],
+        }
+        table_service.merge_entity(table_name, patch)
+
+    # Only entities which have the column need to be updated
+    # Note: selected properties that an entity doesn't have are returned
+    # as None
+    _set_pool_size(table_service, max_workers)
+    _run_in_parallel(
+        _copy,
+        (entity for entity in entities if entity.get(old_column) is not None),
+        max_workers,
+    )
 
 
 def delete_column(
-    table_service: TableService, table_name: str, column_name: str
+    table_service: TableService,
+    table_name: str,
+    column_name: str,
+    max_workers: int = 25,
 ) -> None:
     """
     Deletes a column from all entities in an Azure table.
     This process cannot be done using batches, which is why the
-    process may take a long time for large tables.
+    process may take a long time for large tables (though several
+    entities are updated at the same time).
 
     Args:
         table_service (TableService): Azure table service object
         table_name (str): name of the Azure table
         column_name (str): name of the column to delete
+        max_workers (int): maximum number of entities updated at the
+        same time (25 by default)
     """
     # Query all entities from the table
     entities = table_service.query_entities(table_name)
 
-    for entity in entities:
-        # Check if the entity has the column
-        if column_name in entity:
-            # Create a new entity without the column
-            new_entity = {k: v for k, v in entity.items() if k != column_name}
+    def _delete(entity: Entity) -> None:
+        # Create a new entity without the column
+        new_entity = {k: v for k, v in entity.items() if k != column_name}
 
-            # Replace the old entity with the new one
-            table_service.update_entity(table_name, new_entity)
+        # Replace the old entity with the new one
+        table_service.update_entity(table_name, new_entity)
+
+    # Only entities which have the column need to be updated
+    _set_pool_size(table_service, max_workers)
+    _run_in_parallel(
+        _delete, (entity for entity in entities if column_name in entity), max_workers
+    )
 
 
 def rename_column(
-    table_service: TableService, table_name: str, old_column: str, new_column: str
+    table_service: TableService,
+    table_name: str,
+    old_column: str,
+    new_column: str,
+    max_workers: int = 25,
 ) -> None:
     """
     Renames a column in all entities in an Azure table.
     This process cannot be done using batches, which is why the
-    process may take a long time for large tables.
+    process may take a long time for large tables (though several
+    entities are updated at the same time).
 
     Args:
         table_service (TableService): Azure table service object
         table_name (str): name of the Azure table
         old_column (str): name of the column to rename
         new_column (str): new name for the column
+        max_workers (int): maximum number of entities updated at the
+        same time (25 by default)
     """
-    # Copy the old column to the new column
-    copy_column(table_service, table_name, old_column, new_column)
+    # Query all entities from the table
+    entities = table_service.query_entities(table_name)
 
-    # Delete the old column
-    delete_column(table_service, table_name, old_column)
+    def _rename(entity: Entity) -> None:
+        # Move the value from the old column to the new one and replace
+        # the old entity with the new one in a single update
+        entity[new_column] = entity.pop(old_column)
+        table_service.update_entity(table_name, entity)
+
+    # Only entities which have the column need to be updated
+    _set_pool_size(table_service, max_workers)
+    _run_in_parallel(
+        _rename, (entity for entity in entities if old_column in entity), max_workers
+    )